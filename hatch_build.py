@@ -0,0 +1,60 @@
+import os
+import shutil
+import tempfile
+
+from hatchling.builders.hooks.plugin.interface import BuildHookInterface
+
+# set PYI4THRIFT_CYTHON=1 when building a wheel to compile pyi4thrift.peg with Cython;
+# without Cython or a C compiler the pure Python wheel is built instead
+CYTHON_ENV = "PYI4THRIFT_CYTHON"
+CYTHON_MODULE = "pyi4thrift.peg"
+CYTHON_SOURCE = os.path.join("src", "pyi4thrift", "peg.py")
+
+
+class CythonBuildHook(BuildHookInterface):
+    PLUGIN_NAME = "custom"
+
+    def _enabled(self):
+        return self.target_name == "wheel" and os.environ.get(CYTHON_ENV, "0") not in ("", "0")
+
+    def dependencies(self):
+        if self._enabled():
+            return ["Cython>=3.0", "setuptools"]
+        return []
+
+    def initialize(self, version, build_data):
+        self._build_dir = None
+        if version == "editable" or not self._enabled():
+            return
+
+        self._build_dir = tempfile.mkdtemp(prefix="pyi4thrift-cython-")
+        try:
+            ext_path = self._build_extension(self._build_dir)
+        except Exception as e:
+            self.app.display_warning("%s is set but the Cython build failed, falling back to pure Python: %s"
+                                     % (CYTHON_ENV, e))
+            return
+
+        build_data["pure_python"] = False
+        build_data["infer_tag"] = True
+        build_data["force_include"][ext_path] = "pyi4thrift/%s" % os.path.basename(ext_path)
+
+    def finalize(self, version, build_data, artifact_path):
+        if self._build_dir:
+            shutil.rmtree(self._build_dir, ignore_errors=True)
+
+    def _build_extension(self, build_dir):
+        from Cython.Build import cythonize
+        from setuptools import Distribution, Extension
+        from setuptools.command.build_ext import build_ext
+
+        source = os.path.join(self.root, CYTHON_SOURCE)
+        # annotation_typing is off because Cython would reject lark Tokens (str subclasses) for str annotations
+        ext_modules = cythonize([Extension(CYTHON_MODULE, [source])], build_dir=build_dir, quiet=True,
+                                compiler_directives={"language_level": "3", "annotation_typing": False})
+        cmd = build_ext(Distribution({"ext_modules": ext_modules}))
+        cmd.build_lib = build_dir
+        cmd.build_temp = os.path.join(build_dir, "temp")
+        cmd.ensure_finalized()
+        cmd.run()
+        return cmd.get_ext_fullpath(CYTHON_MODULE)
@@ -10,9 +10,8 @@ from thriftpy2.thrift import TType
 from yapf.yapflib.yapf_api import FormatCode
 
 from pyi4thrift.exceptions import Thrift2pyiException
-from pyi4thrift.peg import compose, PYI, Struct, Init, Parameter, Annotations, Parameters, Annotation, Structs, \
-    Imports, Services, Modules, Service, Methods, Method, Enums, KeyValue, KeyValues, Enum, Exceptions, Exc, \
-    Unions, Union, Consts, Const, FromImport, Module, ModuleAlias
+from pyi4thrift.peg import compose, PYI, Struct, Init, Parameter, Annotations, Parameters, Annotation, Modules, \
+    Service, Methods, Method, KeyValue, KeyValues, Enum, Exc, Union, Const, FromImport, Module, ModuleAlias
 
 
 class Thrift2pyi(object):
@@ -23,13 +22,6 @@ class Thrift2pyi(object):
         self.meta = self.thrift.__thrift_meta__
 
         self.pyi = PYI()
-        self.pyi.imports = Imports()
-        self.pyi.services = Services()
-        self.pyi.structs = Structs()
-        self.pyi.unions = Unions()
-        self.pyi.enums = Enums()
-        self.pyi.exceptions = Exceptions()
-        self.pyi.consts = Consts()
         self.filename = filename
         self.prefix = prefix
         self.out = out
@@ -135,24 +127,16 @@ class Thrift2pyi(object):
         return p_params, p_annotations
 
     def _struct2pyi(self, struct):
-        p_struct = Struct()
-        p_struct.name = struct.__name__
-        p_init = Init()
-        p_init.params, p_struct.annotations = self._spec2params(struct.default_spec, struct.thrift_spec)
-        p_struct.init = p_init
-        return p_struct
+        p_params, p_annotations = self._spec2params(struct.default_spec, struct.thrift_spec)
+        return Struct(name=struct.__name__, annotations=p_annotations, init=Init(params=p_params))
 
     def _structs2pyi(self):
         for struct in self.meta["structs"]:
             self.pyi.structs.append(self._struct2pyi(struct))
 
     def _union2pyi(self, union):
-        p_union = Union()
-        p_union.name = union.__name__
-        p_init = Init()
-        p_init.params, p_union.annotations = self._spec2params(union.default_spec, union.thrift_spec)
-        p_union.init = p_init
-        return p_union
+        p_params, p_annotations = self._spec2params(union.default_spec, union.thrift_spec)
+        return Union(name=union.__name__, annotations=p_annotations, init=Init(params=p_params))
 
     def _unions2pyi(self):
         for union in self.meta["unions"]:
@@ -174,36 +158,27 @@ class Thrift2pyi(object):
     def _includes2pyi(self):
         p_imports = self.pyi.imports
         for k, v in self._imports.items():
-            if k not in p_imports:
-                p_imports[k] = FromImport()
             p_modules = Modules()
             for v_ in v:
-                m = Module()
                 name, alias = (v_, '') if isinstance(v_, str) else (v_[0], v_[1])
-                m.name = name
-                a = ModuleAlias()
-                a.alias = alias
-                m.module_alias = a
-                p_modules.append(m)
-            p_imports[k].modules = p_modules
+                p_modules.append(Module(name=name, module_alias=ModuleAlias(alias=alias)))
+            if k not in p_imports:
+                p_imports[k] = FromImport(modules=p_modules)
+            else:
+                p_imports[k].modules = p_modules
 
     def _service2pyi(self, service):
-        p_service = Service()
-        p_service.name = service.__name__
         p_methods = Methods()
         for method in service.thrift_services:
-            p_method = Method()
-            p_method.name = method
             args = getattr(service, "%s_args" % method)
-            p_method.params, _ = self._spec2params(args.default_spec, args.thrift_spec)
+            p_params, _ = self._spec2params(args.default_spec, args.thrift_spec)
             result = getattr(service, "%s_result" % method)
             if 0 not in result.thrift_spec:
-                p_method.response = 'None'
+                response = 'None'
             else:
-                p_method.response = self._spec2type(result.thrift_spec[0])
-            p_methods[method] = p_method
-        p_service.methods = p_methods
-        return p_service
+                response = self._spec2type(result.thrift_spec[0])
+            p_methods[method] = Method(name=method, params=p_params, response=response)
+        return Service(name=service.__name__, methods=p_methods)
 
     def _services2pyi(self):
         for service in self.meta["services"]:
@@ -219,23 +194,15 @@ class Thrift2pyi(object):
             p_kv.value = self._2v(v)
             p_kvs.append(p_kv)
 
-        p_enum = Enum()
-        p_enum.name = enum.__name__
-        p_enum.kvs = p_kvs
-
-        return p_enum
+        return Enum(name=enum.__name__, kvs=p_kvs)
 
     def _enums2pyi(self):
         for enum in self.meta["enums"]:
             self.pyi.enums.append(self._enum2pyi(enum))
 
     def _exc2pyi(self, exc):
-        p_exc = Exc()
-        p_exc.name = exc.__name__
-        p_init = Init()
-        p_init.params, p_exc.annotations = self._spec2params(exc.default_spec, exc.thrift_spec)
-        p_exc.init = p_init
-        return p_exc
+        p_params, p_annotations = self._spec2params(exc.default_spec, exc.thrift_spec)
+        return Exc(name=exc.__name__, annotations=p_annotations, init=Init(params=p_params))
 
     def _excs2pyi(self):
         if not self.meta["exceptions"]:
@@ -1,8 +1,18 @@
 from __future__ import annotations
 
+import sys
+import threading
 from dataclasses import dataclass, field
+from functools import partial
+from typing import TYPE_CHECKING, cast
 
-from lark import Lark, Tree, Token
+from lark import Lark, Token, Transformer
+
+if TYPE_CHECKING:
+    from dataclasses import dataclass as _dataclass
+else:
+    # slots=True is only accepted by dataclass() from Python 3.10 on
+    _dataclass = partial(dataclass, slots=True) if sys.version_info >= (3, 10) else dataclass
 
 
 _PYI_GRAMMAR = r"""
@@ -14,70 +24,82 @@ start: header imports consts enums structs unions exceptions services
 
 header: "# coding:utf-8" NEWLINE
 
-imports: from_import*
+imports: | imports from_import
 from_import: "from" pkg "import" modules NEWLINE
 pkg: /[A-Za-z_.][\w._]*/
-modules: module ("," module)*
+modules: module | modules "," module
 module: IDENT module_alias?
 module_alias: "as" IDENT
 
-consts: const*
-const: IDENT "=" value? NEWLINE
+consts: | consts const
+const: IDENT "=" VALUE? NEWLINE
 
-enums: enum*
+enums: | enums enum
 enum: class_enum
 class_enum: class_prefix IDENT "(Enum):" NEWLINE kvs
-kvs: kv*
-kv: IDENT "=" value? NEWLINE
+kvs: | kvs kv
+kv: IDENT "=" VALUE? NEWLINE
 
-structs: struct*
+structs: | structs struct
 struct: class_struct
 class_struct: class_prefix IDENT "(object):" NEWLINE annotations init NEWLINE
-annotations: annotation*
-annotation: IDENT ":" type
+annotations: | annotations annotation
+annotation: IDENT ":" TYPE
 
-unions: union*
+unions: | unions union
 union: class_union
 class_union: class_prefix IDENT "(object):" NEWLINE annotations init NEWLINE
 
-exceptions: exception*
+exceptions: | exceptions exception
 exception: class_exception
 class_exception: class_prefix IDENT "(TException):" NEWLINE annotations init NEWLINE
 
-services: service*
+services: | services service
 service: class_service
 class_service: class_prefix IDENT "(object):" NEWLINE methods NEWLINE
-methods: method*
-method: "def" IDENT "(self," params ")" "->" type ":" NEWLINE "  ..." NEWLINE
+methods: | methods method
+method: "def" IDENT "(self," params ")" "->" TYPE ":" NEWLINE "  ..." NEWLINE
 
-params: (param ("," param)*)?
-param: annotation "=" value?
+params: | param_list
+param_list: param | param_list "," param
+param: annotation "=" VALUE?
 
 init: "def __init__(self," params ")" "-> None:" NEWLINE "  ..." NEWLINE
 
 class_prefix: "# noinspection PyPep8Naming, PyShadowingNames" NEWLINE "class"
 
-type: /[\w.\[\]]+/
-IDENT: /[A-Za-z_][\w._]*/
-value: VALUE
+TYPE.2: /[\w.\[\]]+/
+IDENT.2: /(?!(?:from|import|as|def|class)\b)[A-Za-z_][\w.]*/
 VALUE: /[\w\-'.\"\{\}]+/
 """
 
-_PARSER = Lark(_PYI_GRAMMAR, parser="lalr", start="start", maybe_placeholders=False)
+_HEADER = "# coding:utf-8"
+
+_PARSER: Lark | None = None
+_PARSER_LOCK = threading.Lock()
+
 
+def _get_parser() -> Lark:
+    # built on first use; cache=True lets lark reuse the LALR tables across processes
+    global _PARSER
+    if _PARSER is None:
+        with _PARSER_LOCK:
+            if _PARSER is None:
+                _PARSER = Lark(_PYI_GRAMMAR, parser="lalr", start="start", maybe_placeholders=False, cache=True,
+                               transformer=_PYITransformer())
+    return _PARSER
 
-@dataclass
+
+@_dataclass
 class Annotation:
     name: str = ""
     type: str = ""
 
 
-@dataclass
-class Annotations(dict):
-    pass
+Annotations = dict[str, Annotation]
 
 
-@dataclass
+@_dataclass
 class Parameter:
     annotation: Annotation | None = None
     default: str = ""
@@ -95,168 +117,153 @@ class Parameter:
         else:
             self.annotation.name = value
 
+    @property
+    def type(self) -> str:
+        if self.annotation:
+            return self.annotation.type
+        return ""
 
-@dataclass
-class Parameters(list):
-    pass
 
+Parameters = list[Parameter]
 
-@dataclass
+
+@_dataclass
 class Init:
-    params: Parameters = field(default_factory=Parameters)
+    params: Parameters = field(default_factory=list)
 
 
-@dataclass
+@_dataclass
 class Struct:
     name: str = ""
-    annotations: Annotations = field(default_factory=Annotations)
+    annotations: Annotations = field(default_factory=dict)
     init: Init = field(default_factory=Init)
 
 
-@dataclass
-class Structs(list):
-    pass
+Structs = list[Struct]
 
 
-@dataclass
+@_dataclass
 class Union:
     name: str = ""
-    annotations: Annotations = field(default_factory=Annotations)
+    annotations: Annotations = field(default_factory=dict)
     init: Init = field(default_factory=Init)
 
 
-@dataclass
-class Unions(list):
-    pass
+Unions = list[Union]
 
 
-@dataclass
+@_dataclass
 class Exc:
     name: str = ""
-    annotations: Annotations = field(default_factory=Annotations)
+    annotations: Annotations = field(default_factory=dict)
     init: Init = field(default_factory=Init)
 
 
-@dataclass
-class Exceptions(list):
-    pass
+Exceptions = list[Exc]
 
 
-@dataclass
+@_dataclass
 class Method:
     name: str = ""
-    params: Parameters = field(default_factory=Parameters)
+    params: Parameters = field(default_factory=list)
     response: str = ""
 
 
-@dataclass
-class Methods(dict):
-    pass
+Methods = dict[str, Method]
 
 
-@dataclass
+@_dataclass
 class Service:
     name: str = ""
-    methods: Methods = field(default_factory=Methods)
+    methods: Methods = field(default_factory=dict)
 
 
-@dataclass
-class Services(list):
-    pass
+Services = list[Service]
 
 
-@dataclass
+@_dataclass
 class ModuleAlias:
     alias: str = ""
 
 
-@dataclass
+@_dataclass
 class Module:
     name: str = ""
     module_alias: ModuleAlias = field(default_factory=ModuleAlias)
 
 
-@dataclass
-class Modules(list):
-    pass
+Modules = list[Module]
 
 
-@dataclass
+@_dataclass
 class FromImport:
     name: str = ""
-    modules: Modules = field(default_factory=Modules)
+    modules: Modules = field(default_factory=list)
 
 
-@dataclass
-class Imports(dict):
-    pass
+Imports = dict[str, FromImport]
 
 
-@dataclass
+@_dataclass
 class KeyValue:
     name: str = ""
     value: str = ""
 
 
-@dataclass
-class KeyValues(list):
-    pass
+KeyValues = list[KeyValue]
 
 
-@dataclass
+@_dataclass
 class Const:
     name: str = ""
     value: str = ""
 
 
-@dataclass
-class Consts(list):
-    pass
+Consts = list[Const]
 
 
-@dataclass
+@_dataclass
 class Enum:
     name: str = ""
-    kvs: KeyValues = field(default_factory=KeyValues)
+    kvs: KeyValues = field(default_factory=list)
 
 
-@dataclass
-class Enums(list):
-    pass
+Enums = list[Enum]
 
 
-@dataclass
+@_dataclass
 class PYI:
-    imports: Imports = field(default_factory=Imports)
-    consts: Consts = field(default_factory=Consts)
-    enums: Enums = field(default_factory=Enums)
-    structs: Structs = field(default_factory=Structs)
-    unions: Unions = field(default_factory=Unions)
-    exceptions: Exceptions = field(default_factory=Exceptions)
-    services: Services = field(default_factory=Services)
+    imports: Imports = field(default_factory=dict)
+    consts: Consts = field(default_factory=list)
+    enums: Enums = field(default_factory=list)
+    structs: Structs = field(default_factory=list)
+    unions: Unions = field(default_factory=list)
+    exceptions: Exceptions = field(default_factory=list)
+    services: Services = field(default_factory=list)
 
 
-def _token_value(node: Token | Tree | str) -> str:
-    if isinstance(node, Token):
-        return str(node)
-    if isinstance(node, str):
-        return node
-    return ""
+_CLASS_PREFIX = "# noinspection PyPep8Naming, PyShadowingNames\n"
+_EMPTY_INIT_BLOCK = "    def __init__(self,\n                 ) -> None:\n        ...\n\n"
 
 
-def _text_of(tree: Tree, rule: str) -> str:
-    for child in tree.children:
-        if isinstance(child, Tree) and child.data == rule:
-            return _token_value(child.children[0]) if child.children else ""
-    return ""
+def _init_block(params: Parameters) -> str:
+    if not params:
+        return _EMPTY_INIT_BLOCK
+    return ("    def __init__(self,\n"
+            + ",\n".join([f"                 {p.__name__}: {p.type} = {p.default}" for p in params])
+            + ") -> None:\n        ...\n\n")
 
 
-def _find_children(tree: Tree, rule: str) -> list[Tree]:
-    return [child for child in tree.children if isinstance(child, Tree) and child.data == rule]
+def _render_class(name: str, base: str, annotations: Annotations, init_params: Parameters) -> str:
+    fields = "".join([f"    {field_name}: {annotation.type}\n" for field_name, annotation in annotations.items()])
+    return (f"{_CLASS_PREFIX}"
+            f"class {name}({base}):\n"
+            f"{fields}\n"
+            f"{_init_block(init_params)}")
 
 
 def compose(pyi: PYI) -> str:
-    parts = ["# coding:utf-8\n"]
+    parts = [_HEADER + "\n"]
 
     if pyi.imports:
         for pkg, from_import in pyi.imports.items():
@@ -270,246 +277,153 @@ def compose(pyi: PYI) -> str:
         parts.append("\n")
 
     if pyi.consts:
-        for const in pyi.consts:
-            parts.append(f"{const.name} = {const.value}\n")
+        parts.extend([f"{const.name} = {const.value}\n" for const in pyi.consts])
         parts.append("\n")
 
-    if pyi.enums:
-        for enum in pyi.enums:
-            parts.append("# noinspection PyPep8Naming, PyShadowingNames\n")
-            parts.append(f"class {enum.name}(Enum):\n")
-            for kv in enum.kvs:
-                parts.append(f"    {kv.name} = {kv.value}\n")
-            parts.append("\n")
-
-    if pyi.structs:
-        for struct in pyi.structs:
-            parts.append("# noinspection PyPep8Naming, PyShadowingNames\n")
-            parts.append(f"class {struct.name}(object):\n")
-            for name, annotation in struct.annotations.items():
-                parts.append(f"    {name}: {annotation.type}\n")
-            parts.append("\n    def __init__(self,\n")
-            if struct.init.params:
-                params = []
-                for param in struct.init.params:
-                    params.append(f"                 {param.__name__}: {param.annotation.type} = {param.default}")
-                parts.append(",\n".join(params))
-                parts.append(") -> None:\n")
-            else:
-                parts.append("                 ) -> None:\n")
-            parts.append("        ...\n\n")
-
-    if pyi.unions:
-        for union in pyi.unions:
-            parts.append("# noinspection PyPep8Naming, PyShadowingNames\n")
-            parts.append(f"class {union.name}(object):\n")
-            for name, annotation in union.annotations.items():
-                parts.append(f"    {name}: {annotation.type}\n")
-            parts.append("\n    def __init__(self,\n")
-            if union.init.params:
-                params = []
-                for param in union.init.params:
-                    params.append(f"                 {param.__name__}: {param.annotation.type} = {param.default}")
-                parts.append(",\n".join(params))
-                parts.append(") -> None:\n")
-            else:
-                parts.append("                 ) -> None:\n")
-            parts.append("        ...\n\n")
-
-    if pyi.exceptions:
-        for exc in pyi.exceptions:
-            parts.append("# noinspection PyPep8Naming, PyShadowingNames\n")
-            parts.append(f"class {exc.name}(TException):\n")
-            for name, annotation in exc.annotations.items():
-                parts.append(f"    {name}: {annotation.type}\n")
-            parts.append("\n    def __init__(self,\n")
-            if exc.init.params:
-                params = []
-                for param in exc.init.params:
-                    params.append(f"                 {param.__name__}: {param.annotation.type} = {param.default}")
-                parts.append(",\n".join(params))
-                parts.append(") -> None:\n")
-            else:
-                parts.append("                 ) -> None:\n")
-            parts.append("        ...\n\n")
-
-    if pyi.services:
-        for service in pyi.services:
-            parts.append("# noinspection PyPep8Naming, PyShadowingNames\n")
-            parts.append(f"class {service.name}(object):\n")
-            for method_name, method in service.methods.items():
-                parts.append(f"    def {method_name}(self, ")
-                if method.params:
-                    params = []
-                    for param in method.params:
-                        params.append(f"{param.__name__}: {param.annotation.type} = {param.default}")
-                    parts.append(", ".join(params))
-                parts.append(f") -> {method.response}:\n")
-                parts.append("        ...\n\n")
-            parts.append("\n")
+    for enum in pyi.enums:
+        kvs = "".join([f"    {kv.name} = {kv.value}\n" for kv in enum.kvs])
+        parts.extend((_CLASS_PREFIX, f"class {enum.name}(Enum):\n", kvs, "\n"))
+
+    parts.extend([_render_class(struct.name, "object", struct.annotations, struct.init.params)
+                  for struct in pyi.structs])
+    parts.extend([_render_class(union.name, "object", union.annotations, union.init.params)
+                  for union in pyi.unions])
+    parts.extend([_render_class(exc.name, "TException", exc.annotations, exc.init.params)
+                  for exc in pyi.exceptions])
+
+    for service in pyi.services:
+        parts.extend((_CLASS_PREFIX, f"class {service.name}(object):\n"))
+        for method_name, method in service.methods.items():
+            params = ", ".join([f"{p.__name__}: {p.type} = {p.default}" for p in method.params])
+            parts.append(f"    def {method_name}(self, {params}) -> {method.response}:\n        ...\n\n")
+        parts.append("\n")
 
     return "".join(parts).rstrip() + "\n"
 
 
-def _parse_annotation(tree: Tree) -> Annotation:
-    name = _token_value(tree.children[0])
-    type_ = _token_value(tree.children[1])
-    return Annotation(name=name, type=type_)
+class _PYITransformer(Transformer):
+    """Builds the PYI model while the LALR parser reduces, so no parse tree is kept.
+
+    Callbacks receive the already transformed children of each rule; tokens are
+    passed through as-is since lark's Token subclasses str.
+    """
+
+    # the collection rules are left-recursive (rule: | rule item), so each reduction
+    # receives the collection built so far plus one new item and extends it in place
+
+    def _append(self, children: list) -> list:
+        if not children:
+            return []
+        items, item = children
+        items.append(item)
+        return items
+
+    def _add_named(self, children: list) -> dict:
+        if not children:
+            return {}
+        items, item = children
+        items[item.name] = item
+        return items
+
+    consts = enums = kvs = structs = unions = exceptions = services = _append
+    imports = annotations = methods = _add_named
+
+    def start(self, children: list) -> PYI:
+        _, imports, consts, enums, structs, unions, exceptions, services = children
+        return PYI(imports=imports, consts=consts, enums=enums, structs=structs, unions=unions,
+                   exceptions=exceptions, services=services)
+
+    def header(self, children: list) -> None:
+        return None
+
+    def class_prefix(self, children: list) -> None:
+        return None
+
+    def from_import(self, children: list) -> FromImport:
+        return FromImport(name=children[0], modules=children[1])
 
+    def pkg(self, children: list[Token]) -> Token:
+        return children[0]
 
-def _parse_param(tree: Tree) -> Parameter:
-    annotation_tree = tree.children[0]
-    value = _token_value(tree.children[1])
-    annotation = _parse_annotation(annotation_tree)
-    return Parameter(annotation=annotation, default=value)
+    def modules(self, children: list) -> Modules:
+        # module | modules "," module
+        if len(children) == 1:
+            return children
+        modules, module = children
+        modules.append(module)
+        return modules
 
+    def module(self, children: list) -> Module:
+        module_alias = children[1] if len(children) > 1 else ModuleAlias()
+        return Module(name=children[0], module_alias=module_alias)
 
-def _parse_params(tree: Tree) -> Parameters:
-    params = Parameters()
-    if not tree.children:
+    def module_alias(self, children: list[Token]) -> ModuleAlias:
+        return ModuleAlias(alias=children[0])
+
+    def const(self, children: list[Token]) -> Const:
+        # IDENT "=" VALUE? NEWLINE
+        return Const(name=children[0], value=children[1] if len(children) > 2 else "")
+
+    def enum(self, children: list[Enum]) -> Enum:
+        return children[0]
+
+    def class_enum(self, children: list) -> Enum:
+        return Enum(name=children[1], kvs=children[3])
+
+    def kv(self, children: list[Token]) -> KeyValue:
+        return KeyValue(name=children[0], value=children[1] if len(children) > 2 else "")
+
+    def struct(self, children: list[Struct]) -> Struct:
+        return children[0]
+
+    def class_struct(self, children: list) -> Struct:
+        return Struct(name=children[1], annotations=children[3], init=children[4])
+
+    def annotation(self, children: list[Token]) -> Annotation:
+        return Annotation(name=children[0], type=children[1])
+
+    def union(self, children: list[Union]) -> Union:
+        return children[0]
+
+    def class_union(self, children: list) -> Union:
+        return Union(name=children[1], annotations=children[3], init=children[4])
+
+    def exception(self, children: list[Exc]) -> Exc:
+        return children[0]
+
+    def class_exception(self, children: list) -> Exc:
+        return Exc(name=children[1], annotations=children[3], init=children[4])
+
+    def service(self, children: list[Service]) -> Service:
+        return children[0]
+
+    def class_service(self, children: list) -> Service:
+        return Service(name=children[1], methods=children[3])
+
+    def method(self, children: list) -> Method:
+        return Method(name=children[0], params=children[1], response=children[2])
+
+    def params(self, children: list[Parameters]) -> Parameters:
+        return children[0] if children else []
+
+    def param_list(self, children: list) -> Parameters:
+        # param | param_list "," param
+        if len(children) == 1:
+            return children
+        params, param = children
+        params.append(param)
         return params
-    for child in tree.children:
-        if isinstance(child, Tree) and child.data == "param":
-            params.append(_parse_param(child))
-    return params
-
-
-def _parse_annotations(tree: Tree) -> Annotations:
-    annotations = Annotations()
-    for child in tree.children:
-        if isinstance(child, Tree) and child.data == "annotation":
-            ann = _parse_annotation(child)
-            annotations[ann.name] = ann
-    return annotations
-
-
-def _parse_init(tree: Tree) -> Init:
-    init = Init()
-    for child in tree.children:
-        if isinstance(child, Tree) and child.data == "params":
-            init.params = _parse_params(child)
-    return init
-
-
-def _parse_methods(tree: Tree) -> Methods:
-    methods = Methods()
-    for child in tree.children:
-        if isinstance(child, Tree) and child.data == "method":
-            name = _token_value(child.children[0])
-            params = Parameters()
-            response = ""
-            for part in child.children[1:]:
-                if isinstance(part, Tree) and part.data == "params":
-                    params = _parse_params(part)
-                elif isinstance(part, Token):
-                    response = str(part)
-            methods[name] = Method(name=name, params=params, response=response)
-    return methods
-
-
-def _parse_struct_like(tree: Tree) -> tuple[str, Annotations, Init]:
-    name = _token_value(tree.children[1])
-    annotations = Annotations()
-    init = Init()
-    for part in tree.children[2:]:
-        if isinstance(part, Tree) and part.data == "annotations":
-            annotations = _parse_annotations(part)
-        elif isinstance(part, Tree) and part.data == "init":
-            init = _parse_init(part)
-    return name, annotations, init
-
-
-def _parse_imports(tree: Tree) -> Imports:
-    imports = Imports()
-    for child in tree.children:
-        if not (isinstance(child, Tree) and child.data == "from_import"):
-            continue
-        pkg_tree = _find_children(child, "pkg")[0]
-        pkg = _token_value(pkg_tree.children[0])
-        modules = Modules()
-        modules_tree = _find_children(child, "modules")[0]
-        for module_tree in modules_tree.children:
-            if not (isinstance(module_tree, Tree) and module_tree.data == "module"):
-                continue
-            name = _token_value(module_tree.children[0])
-            alias = ""
-            if len(module_tree.children) > 1:
-                alias_tree = module_tree.children[1]
-                if isinstance(alias_tree, Tree) and alias_tree.data == "module_alias":
-                    alias = _token_value(alias_tree.children[0])
-            module = Module(name=name, module_alias=ModuleAlias(alias=alias))
-            modules.append(module)
-        from_import = FromImport(name=pkg, modules=modules)
-        imports[pkg] = from_import
-    return imports
+
+    def param(self, children: list) -> Parameter:
+        return Parameter(annotation=children[0], default=children[1] if len(children) > 1 else "")
+
+    def init(self, children: list) -> Init:
+        return Init(params=children[0])
 
 
 def parse(text: str) -> PYI:
-    tree = _PARSER.parse(text)
-    pyi = PYI()
-
-    for child in tree.children:
-        if not isinstance(child, Tree):
-            continue
-        if child.data == "imports":
-            pyi.imports = _parse_imports(child)
-        elif child.data == "consts":
-            consts = Consts()
-            for const_tree in child.children:
-                if isinstance(const_tree, Tree) and const_tree.data == "const":
-                    name = _token_value(const_tree.children[0])
-                    value = _token_value(const_tree.children[1])
-                    consts.append(Const(name=name, value=value))
-            pyi.consts = consts
-        elif child.data == "enums":
-            enums = Enums()
-            for enum_tree in child.children:
-                if not (isinstance(enum_tree, Tree) and enum_tree.data == "class_enum"):
-                    continue
-                name = _token_value(enum_tree.children[1])
-                kvs = KeyValues()
-                for kv_tree in enum_tree.children:
-                    if isinstance(kv_tree, Tree) and kv_tree.data == "kv":
-                        kv_name = _token_value(kv_tree.children[0])
-                        kv_value = _token_value(kv_tree.children[1])
-                        kvs.append(KeyValue(name=kv_name, value=kv_value))
-                enums.append(Enum(name=name, kvs=kvs))
-            pyi.enums = enums
-        elif child.data == "structs":
-            structs = Structs()
-            for struct_tree in child.children:
-                if not (isinstance(struct_tree, Tree) and struct_tree.data == "class_struct"):
-                    continue
-                name, annotations, init = _parse_struct_like(struct_tree)
-                structs.append(Struct(name=name, annotations=annotations, init=init))
-            pyi.structs = structs
-        elif child.data == "unions":
-            unions = Unions()
-            for union_tree in child.children:
-                if not (isinstance(union_tree, Tree) and union_tree.data == "class_union"):
-                    continue
-                name, annotations, init = _parse_struct_like(union_tree)
-                unions.append(Union(name=name, annotations=annotations, init=init))
-            pyi.unions = unions
-        elif child.data == "exceptions":
-            exceptions = Exceptions()
-            for exc_tree in child.children:
-                if not (isinstance(exc_tree, Tree) and exc_tree.data == "class_exception"):
-                    continue
-                name, annotations, init = _parse_struct_like(exc_tree)
-                exceptions.append(Exc(name=name, annotations=annotations, init=init))
-            pyi.exceptions = exceptions
-        elif child.data == "services":
-            services = Services()
-            for service_tree in child.children:
-                if not (isinstance(service_tree, Tree) and service_tree.data == "class_service"):
-                    continue
-                name = _token_value(service_tree.children[1])
-                methods = Methods()
-                for part in service_tree.children[2:]:
-                    if isinstance(part, Tree) and part.data == "methods":
-                        methods = _parse_methods(part)
-                services.append(Service(name=name, methods=methods))
-            pyi.services = services
-
-    return pyi
+    # a stub with nothing but the header has only empty sections, no need to run lark
+    stripped = text.strip()
+    if not stripped or stripped == _HEADER:
+        return PYI()
+    return cast(PYI, _get_parser().parse(text))
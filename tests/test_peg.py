@@ -0,0 +1,94 @@
+import pytest
+from lark import Lark
+
+from pyi4thrift import peg
+from pyi4thrift.peg import PYI, compose, parse
+
+STUB = (
+    "# coding:utf-8\n"
+    "from typing import Dict, List as L\n"
+    "from .a import a_thrift as a\n"
+    "A = 1\n"
+    "B = 'x'\n"
+    "C =\n"
+    "# noinspection PyPep8Naming, PyShadowingNames\n"
+    "class ExampleEnum(Enum):\n"
+    "    A = 0\n"
+    "    B = 1\n"
+    "\n"
+    "# noinspection PyPep8Naming, PyShadowingNames\n"
+    "class ErrCode(Enum):\n"
+    "    ERR_SUCCESS = 0\n"
+)
+
+
+@pytest.fixture(scope="module")
+def rule_parser():
+    # struct and service bodies cannot be reached from "start", so their rules are parsed directly
+    return Lark(peg._PYI_GRAMMAR, parser="lalr", start=["annotation", "params"], maybe_placeholders=False,
+                transformer=peg._PYITransformer())
+
+
+@pytest.mark.parametrize("text", ["", "  \n\t", "# coding:utf-8", "# coding:utf-8\n"])
+def test_parse_header_only(text):
+    assert parse(text) == PYI()
+
+
+def test_parse_imports():
+    pyi = parse(STUB)
+
+    assert list(pyi.imports) == ["typing", ".a"]
+    typing_modules = pyi.imports["typing"].modules
+    assert [(m.name, m.module_alias.alias) for m in typing_modules] == [("Dict", ""), ("List", "L")]
+    a_modules = pyi.imports[".a"].modules
+    assert [(m.name, m.module_alias.alias) for m in a_modules] == [("a_thrift", "a")]
+
+
+def test_parse_consts():
+    pyi = parse(STUB)
+
+    assert [(c.name, c.value) for c in pyi.consts] == [("A", "1"), ("B", "'x'"), ("C", "")]
+
+
+def test_parse_enums():
+    pyi = parse(STUB)
+
+    assert [e.name for e in pyi.enums] == ["ExampleEnum", "ErrCode"]
+    assert [(kv.name, kv.value) for kv in pyi.enums[0].kvs] == [("A", "0"), ("B", "1")]
+    assert [(kv.name, kv.value) for kv in pyi.enums[1].kvs] == [("ERR_SUCCESS", "0")]
+    assert not (pyi.structs or pyi.unions or pyi.exceptions or pyi.services)
+
+
+def test_compose_parsed():
+    assert compose(parse(STUB)) == (
+        "# coding:utf-8\n"
+        "from typing import Dict, List as L\n"
+        "from .a import a_thrift as a\n"
+        "\n"
+        "A = 1\n"
+        "B = 'x'\n"
+        "C = \n"
+        "\n"
+        "# noinspection PyPep8Naming, PyShadowingNames\n"
+        "class ExampleEnum(Enum):\n"
+        "    A = 0\n"
+        "    B = 1\n"
+        "\n"
+        "# noinspection PyPep8Naming, PyShadowingNames\n"
+        "class ErrCode(Enum):\n"
+        "    ERR_SUCCESS = 0\n"
+    )
+
+
+def test_parse_annotation_type(rule_parser):
+    annotation = rule_parser.parse("M: Dict[str]", start="annotation")
+
+    assert (annotation.name, annotation.type) == ("M", "Dict[str]")
+
+
+def test_parse_params(rule_parser):
+    params = rule_parser.parse("A: bool = False, B: str = '', C: a.A = None", start="params")
+
+    assert [(p.__name__, p.type, p.default) for p in params] == [
+        ("A", "bool", "False"), ("B", "str", "''"), ("C", "a.A", "None")]
+    assert rule_parser.parse("", start="params") == []